@@ -10,3 +10,8 @@ def register_commands():
     cmd.extend('sketch_bbox', commands.sketch_bbox)
     cmd.extend('sketch_radgyr', commands.sketch_radgyr)
     cmd.extend('sketch_sphere', commands.sketch_sphere)
+    cmd.extend('sketch_group', commands.sketch_group)
+    cmd.extend('sketch_group_remove', commands.sketch_group_remove)
+    cmd.extend('sketch_export', commands.sketch_export)
+    cmd.extend('sketch_run', commands.sketch_run)
+    cmd.extend('sketch_points', commands.sketch_points)
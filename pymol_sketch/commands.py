@@ -1,7 +1,30 @@
+import numpy as np
 from pymol import cmd
 from pymol_sketch import utils
 from pymol_sketch import shape
 from pymol_sketch import geometry
+from pymol_sketch import export
+from pymol_sketch import spec
+
+
+# sketch groups created by sketch_group, keyed by the object name
+_groups = {}
+# a name of the sketch group which currently accumulates sketches
+_active_group = None
+
+
+def _create(cgo, name, prefix, alpha, state):
+    """Create a CGO, or add it to the active sketch group if any
+
+    The state is ignored in a sketch group because the group is loaded into
+    a single state.
+    """
+    if _active_group is None:
+        cgo.create(name, prefix, float(alpha), state=int(state))
+        return
+    group = _groups[_active_group]
+    key = name or group.unused_key(prefix)
+    group.add(key, cgo, alpha=float(alpha))
 
 
 def sketch_pseudo_coc(selection, state=None, name=None,
@@ -123,7 +146,7 @@ def sketch_coc(selection='(all)', state=-1, name=None, prefix='coc',
     """
     coc = geometry.find_center_of_coordinates(selection, state=int(state))
     sphere = shape.Sphere(coc, float(radius), utils.str_to_color(color))
-    sphere.create(name, prefix, float(alpha), state=int(state))
+    _create(sphere, name, prefix, alpha, state)
 
     if verbose:
         print('Center of coordinate: %.3f, %.3f, %.3f' % (
@@ -162,7 +185,7 @@ def sketch_com(selection='(all)', state=-1, name=None, prefix='com',
     """
     com = geometry.find_center_of_mass(selection, state=int(state))
     sphere = shape.Sphere(com, float(radius), utils.str_to_color(color))
-    sphere.create(name, prefix, float(alpha), state=int(state))
+    _create(sphere, name, prefix, alpha, state)
 
     if verbose:
         print('Center of mass: %.3f, %.3f, %.3f' % (
@@ -211,7 +234,7 @@ def sketch_bbox(selection='(all)', state=-1, name=None, prefix='bbox',
         color=utils.str_to_color(color),
         linewidth=float(linewidth),
     )
-    box.create(name, prefix, float(alpha), state=int(state))
+    _create(box, name, prefix, alpha, state)
 
     if verbose:
         dimension = geometry.find_bounding_box(
@@ -258,7 +281,7 @@ def sketch_radgyr(selection='(all)', state=-1, mass=True, name=None,
         selection, state=int(state), mass=bool(mass),
     )
     sphere = shape.Sphere(com, float(radius), utils.str_to_color(color))
-    sphere.create(name, prefix, float(alpha), state=int(state))
+    _create(sphere, name, prefix, alpha, state)
 
     if verbose:
         print('Radius of gyration: %.3f at (%.3f, %.3f, %.3f)' % (
@@ -296,4 +319,277 @@ def sketch_sphere(coordinate=(0, 0, 0), state=-1, name=None, prefix='sphere',
     """
     coordinate = utils.str_to_vector(coordinate)
     sphere = shape.Sphere(coordinate, float(radius), utils.str_to_color(color))
-    sphere.create(name, prefix, float(alpha), state=int(state))
+    _create(sphere, name, prefix, alpha, state)
+
+
+def sketch_group(name=None, state=None, lod=None, verbose=True):
+    """
+    Start or finish to accumulate sketches into a single compiled graphic
+    object
+
+    USAGE
+
+        sketch_group name, state=state, lod=lod
+        sketch_group state=state, lod=lod
+
+    ARGUMENTS
+
+        name        a name of the compiled graphic object. sketches drawn
+                    after this command are added to the group instead of
+                    being created as individual objects. omit it to finish
+                    the group and load it into PyMOL
+        state       a state-index where the group is loaded (Default: 0)
+        lod         a level-of-detail mode (auto, full, lines, points or
+                    grid) to draw a large number of spheres and cylinders
+                    cheaply. the full-detail is drawn if None is specified
+                    (Default)
+
+    NOTE
+
+        'name' argument of sketch_* commands is used as a key of the member
+        in the group. use sketch_group_remove to remove a member by the key.
+
+        'state' argument of sketch_* commands is ignored in a group. state
+        and lod apply only when a group is started or finished. they are
+        kept and reused when the group is loaded again, and they are ignored
+        when no group is active.
+
+    EXAMPLE
+
+        sketch_group markers, lod=auto
+        sketch_com chain A, name=A
+        sketch_com chain B, name=B
+        sketch_group
+
+    """
+    global _active_group
+    if state is not None:
+        state = int(state)
+    if name:
+        if name not in _groups:
+            _groups[name] = shape.SketchGroup(name)
+        if state is not None:
+            _groups[name].state = state
+        if lod is not None:
+            _groups[name].lod = lod
+        _active_group = name
+        return
+    if _active_group is None:
+        return
+    group = _groups[_active_group]
+    _active_group = None
+    group.create(state=state, lod=lod)
+
+    if verbose:
+        print('Sketch group %s: %d members' % (group.name, len(group)))
+
+
+def sketch_group_remove(key, group=None):
+    """
+    Remove a member from a sketch group
+
+    USAGE
+
+        sketch_group_remove key, group=group
+
+    ARGUMENTS
+
+        key         a key of the member in the group
+        group       a name of the sketch group. the active group is used if
+                    None is specified (Default)
+
+    NOTE
+
+        The group is loaded again with the state and the lod it was loaded
+        with.
+
+    EXAMPLE
+
+        sketch_group_remove A, group=markers
+
+    """
+    group = group or _active_group
+    if group not in _groups:
+        raise AttributeError('No sketch group is found: %s' % group)
+    _groups[group].remove(key)
+    # the active group is loaded when sketch_group finishes it
+    if group != _active_group:
+        _groups[group].create()
+
+
+def sketch_export(filename, group=None, segments=12, verbose=True):
+    """
+    Export a sketch group into a binary glTF (.glb) or an OBJ (.obj) file
+
+    USAGE
+
+        sketch_export filename, group=group, segments=segments
+
+    ARGUMENTS
+
+        filename    a filename. the format is determined by the extension
+        group       a name of the sketch group. the active group is used if
+                    None is specified (Default)
+        segments    a number of segments around spheres, cylinders and cones
+
+    EXAMPLE
+
+        sketch_export markers.glb, group=markers
+        sketch_export markers.obj, group=markers, segments=24
+
+    """
+    group = group or _active_group
+    if group not in _groups:
+        raise AttributeError('No sketch group is found: %s' % group)
+    if filename.lower().endswith('.glb'):
+        export.write_gltf(_groups[group], filename, segments=int(segments))
+    elif filename.lower().endswith('.obj'):
+        export.write_obj(_groups[group], filename, segments=int(segments))
+    else:
+        raise AttributeError('Unknown file format: %s' % filename)
+
+    if verbose:
+        print('Sketch group %s is exported to %s' % (group, filename))
+
+
+def sketch_run(filename, state=-1, prefix='sketch', lod=None, keep=False,
+               verbose=True):
+    """
+    Draw sketches in a spec file in one pass
+
+    USAGE
+
+        sketch_run filename, state=state, prefix=prefix, lod=lod, keep=keep
+
+    ARGUMENTS
+
+        filename    a spec file (.json, .csv or .npy). see pymol_sketch.spec
+        state       a state-index used for spheres in a .npy file
+        prefix      a prefix of the compiled graphic objects. it will used
+                    only when name is not specified in directives
+        lod         a level-of-detail mode (auto, full, lines, points or
+                    grid). the full-detail is drawn if None is specified
+                    (Default)
+        keep        keep the objects as sketch groups so their members can
+                    be removed by sketch_group_remove or exported by
+                    sketch_export. a copy of the streams is kept in memory
+                    (Default: False)
+
+    NOTE
+
+        Directives are batched into a compiled graphic object for each name
+        and state, which has a member for each alpha-value.
+
+        In an active sketch group, the batches are added to the group keyed
+        by 'name_state', and lod and keep are ignored in favor of those of
+        the group.
+
+    EXAMPLE
+
+        sketch_run markers.json
+        sketch_run probes.npy, lod=auto, keep=1
+
+    """
+    groups = spec.build(spec.load(filename), state=int(state))
+    for name, state, group in groups:
+        if _active_group is None:
+            group.create(name, prefix, state=state, lod=lod or None)
+            if utils.str_to_bool(keep):
+                _groups[group.name] = group
+        else:
+            active = _groups[_active_group]
+            key = '%s_%d' % (name, state) if name else None
+            active.add(key or active.unused_key(prefix), group)
+
+    if verbose:
+        print('Sketch spec %s: %d objects' % (filename, len(groups)))
+
+
+def sketch_points(filename, state=-1, name=None, prefix='points',
+                  radius=1.0, color='gray', colorby=None,
+                  gradient='blue_green_red', alpha=0.5,
+                  representation='spheres', size=4.0, columns=3,
+                  chunk=100000, keep=False, verbose=True):
+    """
+    Draw spheres or points on coordinates in a .npy or a raw binary file
+
+    USAGE
+
+        sketch_points filename, state=state, name=name, prefix=prefix,
+                      radius=radius, color=color, colorby=colorby,
+                      gradient=gradient, alpha=alpha,
+                      representation=representation, size=size,
+                      columns=columns, chunk=chunk, keep=keep
+
+    ARGUMENTS
+
+        filename    a .npy file of (N, 3+) array, or a raw binary file of
+                    float32 with 'columns' columns. the first three columns
+                    are x, y and z
+        state       a state-index if positive number or 0 to all, -1 to current
+        name        a name of the compiled graphic object, it will
+                    automatically specified if None is specified (Default)
+        prefix      a prefix of the compiled graphic object. it will used
+                    only when name is not specified
+        radius      a raidus of the spheres in float
+        color       a color of the spheres
+        colorby     an index of the column used to color the spheres. color
+                    is used if None is specified (Default)
+        gradient    a gradient or a PyMOL palette used with colorby
+        alpha       a alpha-value of the spheres
+        representation  spheres or points
+        size        a size of the points
+        columns     a number of columns in a raw binary file
+        chunk       a number of rows processed at once
+        keep        keep the object as a sketch group so chunks can be
+                    removed by sketch_group_remove or exported by
+                    sketch_export. a copy of the whole stream is kept in
+                    memory until PyMOL quits (Default: False)
+
+    NOTE
+
+        The file is memory-mapped and converted chunk by chunk, so that only
+        one chunk is held in NumPy arrays at a time. The resulting stream of
+        the whole file is still held in memory to be loaded as a single
+        object. the object is a sketch group whose members are the chunks
+        keyed by their indices, and it is released after it is loaded
+        unless keep is specified or it is drawn into an active group.
+
+    EXAMPLE
+
+        sketch_points probes.npy, radius=0.5, color=red
+        sketch_points poses.npy, colorby=3, representation=points
+        sketch_points pockets.npy, colorby=3, gradient=blue_white_red
+
+    """
+    array = utils.load_array(filename, columns=int(columns))
+    chunk = int(chunk)
+    radius = float(radius)
+    color = utils.str_to_color(color)
+    if representation not in ('spheres', 'points'):
+        raise AttributeError('Unknown representation: %s' % representation)
+    if colorby is not None:
+        colorby = int(colorby)
+        lower = float(np.nanmin(array[:, colorby]))
+        upper = float(np.nanmax(array[:, colorby]))
+        gradient = utils.str_to_gradient(gradient)
+
+    group = shape.SketchGroup()
+    for start in range(0, len(array), chunk):
+        points = array[start:start+chunk, 0:3]
+        if colorby is not None:
+            color = utils.colormap(
+                array[start:start+chunk, colorby], gradient, lower, upper,
+            )
+        if representation == 'spheres':
+            cgo = shape.Spheres(points, radius, color)
+        else:
+            cgo = shape.Points(points, color, float(size))
+        group.add('%d' % (start // chunk), cgo)
+    _create(group, name, prefix, alpha, state)
+    if _active_group is None and utils.str_to_bool(keep):
+        # register the object so chunks can be removed or exported
+        _groups[group.name] = group
+
+    if verbose:
+        print('Points: %d from %s' % (len(array), filename))
@@ -0,0 +1,389 @@
+import json
+import struct
+import numpy as np
+from pymol_sketch import stream
+
+
+class Mesh(object):
+    """A triangle mesh, a line set and a point set tessellated from
+    primitives
+
+    ATTRIBUTES
+
+        positions       (V, 3) float32 array of vertex coordinates
+        normals         (V, 3) float32 array of vertex normals
+        colors          (V, 3) float32 array of vertex colors
+        indices         (F, 3) uint32 array of triangle vertex indices
+        line_positions  (L, 3) float32 array of line vertex coordinates
+        line_colors     (L, 3) float32 array of line vertex colors
+        point_positions (P, 3) float32 array of point coordinates
+        point_colors    (P, 3) float32 array of point colors
+
+    """
+    def __init__(self, positions, normals, colors, indices,
+                 line_positions, line_colors, point_positions, point_colors):
+        self.positions = positions
+        self.normals = normals
+        self.colors = colors
+        self.indices = indices
+        self.line_positions = line_positions
+        self.line_colors = line_colors
+        self.point_positions = point_positions
+        self.point_colors = point_colors
+
+
+def _normalize(v):
+    norm = np.linalg.norm(v, axis=-1, keepdims=True)
+    norm[norm == 0] = 1.0
+    return v / norm
+
+
+def _unit_sphere(segments):
+    # UV sphere with segments slices and segments/2 stacks, which has a
+    # single vertex on each pole so no triangle is degenerate
+    slices = max(int(segments), 3)
+    stacks = max(slices // 2, 2)
+    phi = np.linspace(0, np.pi, stacks + 1)[1:-1, None]
+    theta = np.linspace(0, 2 * np.pi, slices, endpoint=False)[None, :]
+    rings = np.stack([
+        np.sin(phi) * np.cos(theta),
+        np.sin(phi) * np.sin(theta),
+        np.cos(phi) * np.ones_like(theta),
+    ], axis=-1).reshape(-1, 3)
+    vertices = np.concatenate([[(0, 0, 1)], rings, [(0, 0, -1)]])
+    north = 0
+    south = len(vertices) - 1
+    # vertex (i, j) on the i-th ring is at 1 + i * slices + j
+    i = np.arange(stacks - 2)[:, None]
+    j = np.arange(slices)[None, :]
+    a = 1 + i * slices + j
+    b = 1 + i * slices + (j + 1) % slices
+    c = a + slices
+    d = b + slices
+    j = j.ravel()
+    k = (j + 1) % slices
+    last = 1 + (stacks - 2) * slices
+    faces = np.concatenate([
+        np.stack([np.full(slices, north), 1 + j, 1 + k], axis=-1),
+        np.stack([a, c, b], axis=-1).reshape(-1, 3),
+        np.stack([b, c, d], axis=-1).reshape(-1, 3),
+        np.stack([last + j, np.full(slices, south), last + k], axis=-1),
+    ])
+    return vertices, faces
+
+
+def tessellate_spheres(spheres, segments=12):
+    """
+    Tessellate (N, 7) spheres of stream.Primitives into a triangle mesh and
+    return (positions, normals, colors, indices)
+    """
+    unit, faces = _unit_sphere(segments)
+    centers = spheres[:, None, 0:3]
+    radii = spheres[:, None, 3:4]
+    positions = (centers + radii * unit[None]).reshape(-1, 3)
+    normals = np.broadcast_to(unit, (len(spheres),) + unit.shape)
+    colors = np.broadcast_to(spheres[:, None, 4:7], normals.shape)
+    offsets = np.arange(len(spheres))[:, None, None] * len(unit)
+    indices = (faces[None] + offsets).reshape(-1, 3)
+    return (
+        positions,
+        normals.reshape(-1, 3),
+        colors.reshape(-1, 3),
+        indices,
+    )
+
+
+def tessellate_frustums(p1, p2, radius1, radius2, color1, color2,
+                        cap1, cap2, segments=12):
+    """
+    Tessellate frustums (cylinders and cones) into a triangle mesh and return
+    (positions, normals, colors, indices)
+
+    ARGUMENTS
+
+        p1, p2              (N, 3) arrays of the base and the tip coordinates
+        radius1, radius2    (N,) arrays of the base and the tip radii
+        color1, color2      (N, 3) arrays of the base and the tip colors
+        cap1, cap2          (N,) bool arrays to fill the base and the tip
+        segments            a number of segments around the axis
+
+    """
+    n = len(p1)
+    segments = max(int(segments), 3)
+    axis = p2 - p1
+    length = np.linalg.norm(axis, axis=-1)[:, None]
+    axis = _normalize(axis)
+    # find orthonormal basis (u, v, axis) of each frustum
+    helper = np.zeros_like(axis)
+    parallel = np.abs(axis[:, 0]) > 0.9
+    helper[~parallel, 0] = 1.0
+    helper[parallel, 1] = 1.0
+    u = _normalize(np.cross(axis, helper))
+    v = np.cross(axis, u)
+
+    theta = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    radial = (
+        np.cos(theta)[None, :, None] * u[:, None, :] +
+        np.sin(theta)[None, :, None] * v[:, None, :]
+    )
+    ring1 = p1[:, None, :] + radius1[:, None, None] * radial
+    ring2 = p2[:, None, :] + radius2[:, None, None] * radial
+    # slant normals of the side surface
+    side = _normalize(
+        radial * length[:, None, :] +
+        axis[:, None, :] * (radius1 - radius2)[:, None, None]
+    )
+    ones = np.ones((n, segments, 1))
+    positions = np.concatenate([
+        ring1, ring2,
+        ring1, p1[:, None, :],
+        ring2, p2[:, None, :],
+    ], axis=1)
+    normals = np.concatenate([
+        side, side,
+        ones * -axis[:, None, :], -axis[:, None, :],
+        ones * axis[:, None, :], axis[:, None, :],
+    ], axis=1)
+    colors = np.concatenate([
+        ones * color1[:, None, :], ones * color2[:, None, :],
+        ones * color1[:, None, :], color1[:, None, :],
+        ones * color2[:, None, :], color2[:, None, :],
+    ], axis=1)
+
+    # vertex layout: side ring1, side ring2, cap1 ring, cap1 center,
+    # cap2 ring, cap2 center
+    j = np.arange(segments)
+    k = (j + 1) % segments
+    s = segments
+    # a triangle with two vertices on a ring of zero radius is degenerate
+    side1_faces = np.stack([j, k, s + j], axis=-1)
+    side2_faces = np.stack([k, s + k, s + j], axis=-1)
+    center1 = np.full(segments, 3 * s)
+    center2 = np.full(segments, 4 * s + 1)
+    cap1_faces = np.stack([center1, 2 * s + k, 2 * s + j], axis=-1)
+    cap2_faces = np.stack([center2, 3 * s + 1 + j, 3 * s + 1 + k], axis=-1)
+
+    offsets = np.arange(n)[:, None, None] * (4 * s + 2)
+    indices = [
+        (side1_faces[None] + offsets[radius1 > 0]).reshape(-1, 3),
+        (side2_faces[None] + offsets[radius2 > 0]).reshape(-1, 3),
+    ]
+    cap1 = np.asarray(cap1, dtype=bool) & (radius1 > 0)
+    cap2 = np.asarray(cap2, dtype=bool) & (radius2 > 0)
+    indices.append((cap1_faces[None] + offsets[cap1]).reshape(-1, 3))
+    indices.append((cap2_faces[None] + offsets[cap2]).reshape(-1, 3))
+    return (
+        positions.reshape(-1, 3),
+        normals.reshape(-1, 3),
+        colors.reshape(-1, 3),
+        np.concatenate(indices),
+    )
+
+
+def tessellate(primitive, segments=12):
+    """
+    Tessellate spheres, cylinders, cones, lines and points in a primitive
+    stream and return a Mesh
+
+    ARGUMENTS
+
+        primitive   a CGO instance or a primitive stream (list)
+        segments    a number of segments around spheres, cylinders and cones
+
+    """
+    primitive = getattr(primitive, 'primitive', primitive)
+    primitives = stream.parse(primitive)
+    cylinders = primitives.cylinders
+    cones = primitives.cones
+    frustums = tessellate_frustums(
+        np.concatenate([cylinders[:, 0:3], cones[:, 0:3]]),
+        np.concatenate([cylinders[:, 3:6], cones[:, 3:6]]),
+        np.concatenate([cylinders[:, 6], cones[:, 6]]),
+        np.concatenate([cylinders[:, 6], cones[:, 7]]),
+        np.concatenate([cylinders[:, 7:10], cones[:, 8:11]]),
+        np.concatenate([cylinders[:, 10:13], cones[:, 11:14]]),
+        np.concatenate([np.ones(len(cylinders)), cones[:, 14]]),
+        np.concatenate([np.ones(len(cylinders)), cones[:, 15]]),
+        segments=segments,
+    )
+    spheres = tessellate_spheres(primitives.spheres, segments=segments)
+    offset = len(spheres[0])
+    lines = primitives.lines
+    return Mesh(
+        positions=np.concatenate(
+            [spheres[0], frustums[0]]).astype(np.float32),
+        normals=np.concatenate(
+            [spheres[1], frustums[1]]).astype(np.float32),
+        colors=np.concatenate(
+            [spheres[2], frustums[2]]).astype(np.float32),
+        indices=np.concatenate(
+            [spheres[3], frustums[3] + offset]).astype(np.uint32),
+        line_positions=np.concatenate(
+            [lines[:, 0:3], lines[:, 3:6]], axis=1,
+        ).reshape(-1, 3).astype(np.float32),
+        line_colors=np.concatenate(
+            [lines[:, 6:9], lines[:, 9:12]], axis=1,
+        ).reshape(-1, 3).astype(np.float32),
+        point_positions=primitives.points[:, 0:3].astype(np.float32),
+        point_colors=primitives.points[:, 3:6].astype(np.float32),
+    )
+
+
+# glTF constants
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+_FLOAT = 5126
+_UNSIGNED_INT = 5125
+_MODE_POINTS = 0
+_MODE_LINES = 1
+_MODE_TRIANGLES = 4
+
+
+def write_gltf(primitive, filename, segments=12):
+    """
+    Write spheres, cylinders, cones, lines and points in a primitive stream
+    into a binary glTF (.glb) file
+
+    ARGUMENTS
+
+        primitive   a CGO instance or a primitive stream (list)
+        filename    a filename of the binary glTF file
+        segments    a number of segments around spheres, cylinders and cones
+
+    """
+    mesh = tessellate(primitive, segments=segments)
+    chunks = []
+    views = []
+    accessors = []
+
+    def add_accessor(array, type_, target, bounds=False):
+        data = np.ascontiguousarray(array).tobytes()
+        offset = sum(len(c) for c in chunks)
+        chunks.append(data + b'\x00' * (-len(data) % 4))
+        views.append({
+            'buffer': 0,
+            'byteOffset': offset,
+            'byteLength': len(data),
+            'target': target,
+        })
+        accessor = {
+            'bufferView': len(views) - 1,
+            'componentType': (
+                _UNSIGNED_INT if array.dtype == np.uint32 else _FLOAT
+            ),
+            'count': int(array.size if type_ == 'SCALAR' else len(array)),
+            'type': type_,
+        }
+        if bounds:
+            accessor['min'] = array.min(axis=0).tolist()
+            accessor['max'] = array.max(axis=0).tolist()
+        accessors.append(accessor)
+        return len(accessors) - 1
+
+    primitives = []
+    if len(mesh.indices):
+        primitives.append({
+            'attributes': {
+                'POSITION': add_accessor(
+                    mesh.positions, 'VEC3', _ARRAY_BUFFER, bounds=True),
+                'NORMAL': add_accessor(
+                    mesh.normals, 'VEC3', _ARRAY_BUFFER),
+                'COLOR_0': add_accessor(
+                    mesh.colors, 'VEC3', _ARRAY_BUFFER),
+            },
+            'indices': add_accessor(
+                mesh.indices.ravel(), 'SCALAR', _ELEMENT_ARRAY_BUFFER),
+            'mode': _MODE_TRIANGLES,
+        })
+    if len(mesh.line_positions):
+        primitives.append({
+            'attributes': {
+                'POSITION': add_accessor(
+                    mesh.line_positions, 'VEC3', _ARRAY_BUFFER, bounds=True),
+                'COLOR_0': add_accessor(
+                    mesh.line_colors, 'VEC3', _ARRAY_BUFFER),
+            },
+            'mode': _MODE_LINES,
+        })
+    if len(mesh.point_positions):
+        primitives.append({
+            'attributes': {
+                'POSITION': add_accessor(
+                    mesh.point_positions, 'VEC3', _ARRAY_BUFFER,
+                    bounds=True),
+                'COLOR_0': add_accessor(
+                    mesh.point_colors, 'VEC3', _ARRAY_BUFFER),
+            },
+            'mode': _MODE_POINTS,
+        })
+
+    binary = b''.join(chunks)
+    document = {
+        'asset': {'version': '2.0', 'generator': 'pymol-sketch'},
+        'scene': 0,
+        'scenes': [{'nodes': [0]} if primitives else {}],
+    }
+    if primitives:
+        document.update({
+            'nodes': [{'mesh': 0}],
+            'meshes': [{'primitives': primitives}],
+            'accessors': accessors,
+            'bufferViews': views,
+            'buffers': [{'byteLength': len(binary)}],
+        })
+    header = json.dumps(document, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-len(header) % 4)
+
+    with open(filename, 'wb') as fo:
+        length = 12 + 8 + len(header)
+        if binary:
+            length += 8 + len(binary)
+        fo.write(struct.pack('<4sII', b'glTF', 2, length))
+        fo.write(struct.pack('<I4s', len(header), b'JSON'))
+        fo.write(header)
+        if binary:
+            fo.write(struct.pack('<I4s', len(binary), b'BIN\x00'))
+            fo.write(binary)
+
+
+def _write_rows(fo, fmt, array, chunksize=65536):
+    # format rows chunk by chunk without a python loop over each row
+    for start in range(0, len(array), chunksize):
+        chunk = array[start:start+chunksize]
+        fo.write((fmt * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def write_obj(primitive, filename, segments=12):
+    """
+    Write spheres, cylinders, cones, lines and points in a primitive stream
+    into a Wavefront OBJ file with vertex colors
+
+    ARGUMENTS
+
+        primitive   a CGO instance or a primitive stream (list)
+        filename    a filename of the OBJ file
+        segments    a number of segments around spheres, cylinders and cones
+
+    """
+    mesh = tessellate(primitive, segments=segments)
+    vertices = np.concatenate([
+        np.concatenate([mesh.positions, mesh.colors], axis=1),
+        np.concatenate([mesh.line_positions, mesh.line_colors], axis=1),
+        np.concatenate([mesh.point_positions, mesh.point_colors], axis=1),
+    ])
+    # OBJ indices are 1-based, and lines and points follow the triangle mesh
+    # vertices in this order
+    faces = mesh.indices.astype(np.int64) + 1
+    offset = len(mesh.positions) + 1
+    lines = np.arange(len(mesh.line_positions)).reshape(-1, 2) + offset
+    offset += len(mesh.line_positions)
+    points = np.arange(len(mesh.point_positions)).reshape(-1, 1) + offset
+    with open(filename, 'w') as fo:
+        fo.write('# pymol-sketch\n')
+        _write_rows(fo, 'v %.6f %.6f %.6f %.6f %.6f %.6f\n', vertices)
+        _write_rows(fo, 'vn %.6f %.6f %.6f\n', mesh.normals)
+        _write_rows(
+            fo, 'f %d//%d %d//%d %d//%d\n', np.repeat(faces, 2, axis=1),
+        )
+        _write_rows(fo, 'l %d %d\n', lines)
+        _write_rows(fo, 'p %d\n', points)
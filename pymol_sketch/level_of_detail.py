@@ -0,0 +1,185 @@
+import numpy as np
+from pymol import cgo
+from pymol_sketch import stream
+
+
+AUTO = 'auto'
+FULL = 'full'
+LINES = 'lines'
+POINTS = 'points'
+GRID = 'grid'
+
+
+def decimate(spheres, grid_size):
+    """
+    Merge (N, 7) spheres which fall into a same grid cell into a sphere
+
+    The merged sphere is placed on the mean coordinate with the mean color
+    and the largest radius of the spheres in the cell.
+    """
+    if len(spheres) == 0:
+        return spheres
+    cells = np.floor(spheres[:, 0:3] / float(grid_size)).astype(np.int64)
+    _, inverse, counts = np.unique(
+        cells, axis=0, return_inverse=True, return_counts=True,
+    )
+    inverse = inverse.ravel()
+    merged = np.empty((len(counts), 7))
+    for k in (0, 1, 2, 4, 5, 6):
+        merged[:, k] = np.bincount(inverse, weights=spheres[:, k]) / counts
+    merged[:, 3] = 0
+    np.maximum.at(merged[:, 3], inverse, spheres[:, 3])
+    return merged
+
+
+class LevelOfDetail(object):
+    """Thresholds which determine a representation of batched primitives
+
+    ARGUMENTS
+
+        points      a number of spheres above which spheres are drawn as
+                    points (Default: 20000)
+        lines       a number of cylinders and cones above which they are
+                    drawn as lines (Default: 5000)
+        grid        a number of spheres above which spheres in a same grid
+                    cell are merged. merged spheres are drawn as points
+                    when they still exceed 'points' (Default: 200000)
+        grid_size   a size of the grid cell (Default: 2.0)
+        point_size  a size of the points (Default: 4.0)
+        linewidth   a width of the lines (Default: 2.0)
+
+    MODES
+
+        auto        pick a representation from the thresholds
+        full        draw everything as it is
+        lines       draw cylinders and cones as lines
+        points      draw spheres as points, cylinders and cones as lines
+        grid        merge spheres in a grid, cylinders and cones as lines.
+                    merged spheres exceeding 'points' are drawn as points
+
+    """
+    def __init__(self, points=20000, lines=5000, grid=200000,
+                 grid_size=2.0, point_size=4.0, linewidth=2.0):
+        self.points = points
+        self.lines = lines
+        self.grid = grid
+        self.grid_size = grid_size
+        self.point_size = point_size
+        self.linewidth = linewidth
+
+    def resolve(self, primitives, mode=AUTO):
+        """
+        Return representations (sphere_mode, cylinder_mode) of
+        stream.Primitives in the mode
+        """
+        if mode == AUTO:
+            n = len(primitives.spheres)
+            if n > self.grid:
+                sphere_mode = GRID
+            elif n > self.points:
+                sphere_mode = POINTS
+            else:
+                sphere_mode = FULL
+            n = len(primitives.cylinders) + len(primitives.cones)
+            cylinder_mode = LINES if n > self.lines else FULL
+            return sphere_mode, cylinder_mode
+        elif mode == FULL:
+            return FULL, FULL
+        elif mode == LINES:
+            return FULL, LINES
+        elif mode in (POINTS, GRID):
+            return mode, LINES
+        raise AttributeError('Unknown level-of-detail: %s' % mode)
+
+    def reduce(self, primitives, modes):
+        """
+        Build a primitive stream of stream.Primitives in the representations
+        (sphere_mode, cylinder_mode)
+
+        Primitives are batched by their alpha-values. Batches without an
+        alpha-value are drawn before 'rest' of the stream so they inherit
+        the alpha-value of the object, and the others follow with their own
+        ALPHA.
+        """
+        sphere_mode, cylinder_mode = modes
+        spheres = primitives.spheres
+        sphere_alphas = primitives.sphere_alphas
+        if sphere_mode == GRID:
+            merged = [
+                (decimate(spheres[mask], self.grid_size), alpha)
+                for alpha, mask in _split_by_alpha(sphere_alphas)
+            ]
+            spheres = np.concatenate([m for m, _ in merged] + [spheres[:0]])
+            sphere_alphas = np.concatenate(
+                [np.full(len(m), np.nan if alpha is None else alpha)
+                 for m, alpha in merged] + [[]]
+            )
+            # spheres which are not merged enough are drawn as points
+            if len(spheres) > self.points:
+                sphere_mode = POINTS
+
+        cylinders = primitives.cylinders
+        cones = primitives.cones
+        cylinder_alphas = np.concatenate(
+            [primitives.cylinder_alphas, primitives.cone_alphas]
+        )
+        if cylinder_mode == LINES:
+            lines = np.concatenate([
+                np.concatenate([cylinders[:, 0:6], cones[:, 0:6]]),
+                np.concatenate([cylinders[:, 7:13], cones[:, 8:14]]),
+            ], axis=1)
+
+        batches = []
+        alphas = np.concatenate([sphere_alphas, cylinder_alphas])
+        for alpha, _ in _split_by_alpha(alphas):
+            mask = _same_alpha(sphere_alphas, alpha)
+            if sphere_mode == POINTS:
+                primitive = stream.points_to_primitive(
+                    np.concatenate([
+                        spheres[mask, 0:3], spheres[mask, 4:7],
+                    ], axis=1),
+                    size=self.point_size,
+                )
+            else:
+                primitive = stream.spheres_to_primitive(spheres[mask])
+            mask = _same_alpha(cylinder_alphas, alpha)
+            if cylinder_mode == LINES:
+                primitive += stream.lines_to_primitive(
+                    lines[mask], linewidth=self.linewidth,
+                )
+            else:
+                n = len(cylinders)
+                primitive += stream.cylinders_to_primitive(
+                    cylinders[mask[:n]],
+                )
+                primitive += stream.cones_to_primitive(cones[mask[n:]])
+            batches.append((alpha, primitive))
+
+        primitive = []
+        for alpha, batch in batches:
+            if alpha is None:
+                primitive += batch
+        primitive += primitives.rest
+        for alpha, batch in batches:
+            if alpha is not None:
+                primitive += [cgo.ALPHA, alpha] + batch
+        return primitive
+
+
+def _same_alpha(alphas, alpha):
+    if alpha is None:
+        return np.isnan(alphas)
+    return alphas == alpha
+
+
+def _split_by_alpha(alphas):
+    """Yield (alpha, mask) for each alpha-value, where alpha is None for NaN"""
+    inherited = np.isnan(alphas)
+    if inherited.any():
+        yield None, inherited
+    for alpha in np.unique(alphas[~inherited]):
+        yield float(alpha), alphas == alpha
+
+
+# the thresholds used when a mode is specified to CGO.create
+default = LevelOfDetail()
@@ -1,10 +1,16 @@
+import numpy as np
 from chempy import cpv
 from pymol import cgo
 from pymol import cmd
+from pymol_sketch import stream
+from pymol_sketch import level_of_detail
 
 
 class CGO(object):
     """A representation object of a compiled graphic object"""
+    # parsed primitives and reduced streams of the level-of-detail
+    _lod_cache = None
+
     def __init__(self):
         self._primitive = []
 
@@ -12,11 +18,40 @@ class CGO(object):
     def primitive(self):
         return self._primitive
 
+    def lod_primitive(self, lod=level_of_detail.AUTO):
+        """
+        Return a primitive stream reduced by the level-of-detail
+
+        lod is a mode ('auto', 'full', 'lines', 'points' or 'grid') used
+        with the default thresholds, or a LevelOfDetail instance used in
+        'auto' mode. Reduced streams are cached and the full-detail stream
+        is kept as it is.
+        """
+        if isinstance(lod, level_of_detail.LevelOfDetail):
+            level, mode = lod, level_of_detail.AUTO
+        else:
+            level, mode = level_of_detail.default, lod
+        if self._lod_cache is None:
+            self._lod_cache = {None: stream.parse(self.primitive)}
+        primitives = self._lod_cache[None]
+        modes = level.resolve(primitives, mode)
+        if modes == (level_of_detail.FULL, level_of_detail.FULL):
+            return self.primitive
+        key = (modes, level.points, level.grid_size, level.point_size,
+               level.linewidth)
+        if key not in self._lod_cache:
+            self._lod_cache[key] = level.reduce(primitives, modes)
+        return self._lod_cache[key]
+
     def create(self, name=None, prefix='cgo', alpha=1.0, state=0,
-               overwrite=None):
+               overwrite=None, lod=None):
         """
         Create a compiled graphic object with given name
+
+        Specify lod to draw a cheaper representation of a large number of
+        spheres, cylinders and cones (see lod_primitive)
         """
+        primitive = self.lod_primitive(lod) if lod else self.primitive
         if name is None:
             name = cmd.get_unused_name(prefix)
         if overwrite is None and state == 0:
@@ -30,7 +65,7 @@ class CGO(object):
         cmd.set('auto_zoom', 0.0)
         # create CGO
         cmd.load_cgo(
-            [cgo.ALPHA, float(alpha)] + self.primitive, name, state=state
+            [cgo.ALPHA, float(alpha)] + primitive, name, state=state
         )
         # restore auto_zoom value
         cmd.set('auto_zoom', float(original_auto_zoom))
@@ -44,6 +79,139 @@ class CGO(object):
         return cgo
 
 
+class SketchGroup(CGO):
+    """A compiled graphic object which consolidates several CGOs
+
+    All members share a single primitive buffer so the group is loaded into
+    PyMOL as one object. An offset index into the buffer is kept for each
+    member so a member can be updated or removed by its key without
+    rebuilding the whole stream.
+
+    ARGUMENTS
+
+        name        A name of the compiled graphic object (optional)
+        state       A state-index where the group is loaded (optional: 0)
+        lod         A level-of-detail used to load the group (optional)
+        alpha       A alpha-value used to load the group (optional: 1.0)
+
+    """
+    def __init__(self, name=None, state=0, lod=None, alpha=1.0):
+        self.name = name
+        self.state = state
+        self.lod = lod
+        self.alpha = alpha
+        self._primitive = []
+        self._keys = []
+        self._offsets = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._offsets
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def keys(self):
+        return list(self._keys)
+
+    def unused_key(self, prefix='cgo'):
+        """
+        Return a key which is not used in the group yet
+        """
+        n = len(self._keys) + 1
+        key = '%s%02d' % (prefix, n)
+        while key in self._offsets:
+            n += 1
+            key = '%s%02d' % (prefix, n)
+        return key
+
+    def get(self, key):
+        """
+        Return a primitive of the member specified by the key
+        """
+        start, length = self._offsets[key]
+        return self._primitive[start:start+length]
+
+    def add(self, key, cgo, alpha=None):
+        """
+        Add a CGO to the group with the key, or update the member if the key
+        has already been used
+        """
+        if key in self._offsets:
+            return self.update(key, cgo, alpha)
+        primitive = self._member_primitive(cgo, alpha)
+        self._offsets[key] = (len(self._primitive), len(primitive))
+        self._keys.append(key)
+        self._primitive.extend(primitive)
+        self._lod_cache = None
+
+    def update(self, key, cgo, alpha=None):
+        """
+        Replace a member specified by the key with the CGO
+        """
+        start, length = self._offsets[key]
+        primitive = self._member_primitive(cgo, alpha)
+        self._primitive[start:start+length] = primitive
+        self._offsets[key] = (start, len(primitive))
+        self._shift(key, len(primitive) - length)
+        self._lod_cache = None
+
+    def remove(self, key):
+        """
+        Remove a member specified by the key from the group
+        """
+        start, length = self._offsets[key]
+        del self._primitive[start:start+length]
+        self._shift(key, -length)
+        del self._offsets[key]
+        self._keys.remove(key)
+        self._lod_cache = None
+
+    def create(self, name=None, prefix='group', alpha=None, state=None,
+               overwrite=None, lod=None):
+        """
+        Create a compiled graphic object of the group with given name
+
+        The alpha-value, the state and the level-of-detail of the group are
+        used when they are not specified, and they are updated when they
+        are.
+        """
+        name = name or self.name
+        if name is None:
+            name = cmd.get_unused_name(prefix)
+        if state is None:
+            state = self.state
+        if lod is None:
+            lod = self.lod
+        if alpha is None:
+            alpha = self.alpha
+        self.name = name
+        self.alpha = alpha
+        self.state = state
+        self.lod = lod
+        super(SketchGroup, self).create(
+            name, prefix, alpha, state=state, overwrite=overwrite, lod=lod,
+        )
+
+    def _member_primitive(self, cgo_, alpha):
+        # the stream is shared so each member restores its own alpha-value
+        primitive = list(cgo_.primitive)
+        if alpha is not None:
+            primitive = [cgo.ALPHA, float(alpha)] + primitive
+        return primitive
+
+    def _shift(self, key, delta):
+        # shift offsets of the members which follow the key
+        if delta == 0:
+            return
+        index = self._keys.index(key)
+        for k in self._keys[index+1:]:
+            start, length = self._offsets[k]
+            self._offsets[k] = (start + delta, length)
+
+
 class Sphere(CGO):
     """A sphere compiled graphic object
 
@@ -66,6 +234,43 @@ class Sphere(CGO):
         ]
 
 
+class Spheres(CGO):
+    """A batch of spheres in a compiled graphic object
+
+    ARGUMENTS
+
+        points      (N, 3) array of coordinates of the centers of the spheres
+        radius      A radius or (N,) array of radii of the spheres
+        color       A color vector (r, g, b) or (N, 3) array of colors
+
+    """
+    def __init__(self, points, radius, color):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        spheres = np.empty((len(points), 7))
+        spheres[:, 0:3] = points
+        spheres[:, 3] = radius
+        spheres[:, 4:7] = color
+        self._primitive = stream.spheres_to_primitive(spheres)
+
+
+class Points(CGO):
+    """A batch of points in a compiled graphic object
+
+    ARGUMENTS
+
+        points      (N, 3) array of coordinates of the points
+        color       A color vector (r, g, b) or (N, 3) array of colors
+        size        A size of the points (optional)
+
+    """
+    def __init__(self, points, color, size=None):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        rows = np.empty((len(points), 6))
+        rows[:, 0:3] = points
+        rows[:, 3:6] = color
+        self._primitive = stream.points_to_primitive(rows, size)
+
+
 class Cylinder(CGO):
     """A cylinder compiled graphic object
 
@@ -93,6 +298,31 @@ class Cylinder(CGO):
         ]
 
 
+class Cylinders(CGO):
+    """A batch of cylinders in a compiled graphic object
+
+    ARGUMENTS
+
+        p1          (N, 3) array of coordinates of the point 1
+        p2          (N, 3) array of coordinates of the point 2
+        radius      A radius or (N,) array of radii of the cylinders
+        color1      A color vector (r, g, b) or (N, 3) array of colors of the
+                    point 1
+        color2      A color vector (r, g, b) or (N, 3) array of colors of the
+                    point 2 (optional)
+
+    """
+    def __init__(self, p1, p2, radius, color1, color2=None):
+        p1 = np.asarray(p1, dtype=np.float64).reshape(-1, 3)
+        cylinders = np.empty((len(p1), 13))
+        cylinders[:, 0:3] = p1
+        cylinders[:, 3:6] = p2
+        cylinders[:, 6] = radius
+        cylinders[:, 7:10] = color1
+        cylinders[:, 10:13] = color1 if color2 is None else color2
+        self._primitive = stream.cylinders_to_primitive(cylinders)
+
+
 class Cone(CGO):
     """A cone compiled graphic object
 
@@ -238,3 +468,42 @@ class Box(CGO):
 
             cgo.END
         ]
+
+
+class Boxes(CGO):
+    """A batch of boxes in a compiled graphic object
+
+    ARGUMENTS
+
+        minimum     (N, 3) array of the minimum coordinates of the boxes
+        maximum     (N, 3) array of the maximum coordinates of the boxes
+        color       A color vector (r, g, b) or (N, 3) array of colors
+        linewidth   A line width (Default: 2.0)
+
+    """
+    # vertices of the figure in Box in (x, y, z) where 0 is minimum and 1 is
+    # maximum, and edges between them
+    VERTICES = np.array([
+        (0, 1, 0), (1, 1, 0), (1, 0, 0), (0, 0, 0),
+        (0, 1, 1), (1, 1, 1), (1, 0, 1), (0, 0, 1),
+    ], dtype=bool)
+    EDGES = np.array([
+        (0, 1), (1, 2), (2, 3), (3, 0),
+        (4, 5), (5, 6), (6, 7), (7, 4),
+        (0, 4), (3, 7), (1, 5), (2, 6),
+    ])
+
+    def __init__(self, minimum, maximum, color, linewidth=2.0):
+        minimum = np.asarray(minimum, dtype=np.float64).reshape(-1, 3)
+        maximum = np.asarray(maximum, dtype=np.float64).reshape(-1, 3)
+        vertices = np.where(
+            self.VERTICES[None], maximum[:, None, :], minimum[:, None, :],
+        )
+        edges = vertices[:, self.EDGES, :].reshape(-1, 6)
+        lines = np.empty((len(edges), 12))
+        lines[:, 0:6] = edges
+        lines[:, 6:9] = np.repeat(
+            np.broadcast_to(color, (len(minimum), 3)), len(self.EDGES), axis=0,
+        )
+        lines[:, 9:12] = lines[:, 6:9]
+        self._primitive = stream.lines_to_primitive(lines, linewidth)
@@ -0,0 +1,218 @@
+import csv
+import json
+import math
+from collections import OrderedDict
+import numpy as np
+import chempy
+from pymol import cmd
+from pymol_sketch import utils
+from pymol_sketch import shape
+
+
+# directives available in a spec file
+COMMANDS = ('sphere', 'coc', 'com', 'bbox', 'radgyr')
+
+
+def load(filename):
+    """
+    Load directives from a spec file
+
+    A spec file is a JSON list of objects or a CSV file with a header, and
+    each object or row is a directive which has the following keys. Missing
+    keys fall back to the defaults of the corresponding sketch_* command.
+
+        command     sphere, coc, com, bbox or radgyr (sketch_ prefix allowed)
+        selection   a selection-expression
+        state       a state-index
+        name        a name of the compiled graphic object
+        coordinate  a coordinate vector of a sphere, or x, y and z
+        radius      a radius of a sphere
+        mass        use mass-weighted radius of gyration
+        padding     padding width of a box
+        linewidth   line width of a box
+        color       a color name or a color vector
+        alpha       a alpha-value
+
+    A .npy file is a (N, 3+) array of spheres whose columns are
+    x, y, z, radius, r, g, b and alpha. Trailing columns are optional.
+    """
+    if filename.lower().endswith('.npy'):
+        return np.load(filename, mmap_mode='r')
+    with open(filename, 'r') as fi:
+        if filename.lower().endswith('.json'):
+            return json.load(fi)
+        elif filename.lower().endswith('.csv'):
+            # empty cells are treated as missing values
+            return [
+                dict((k, v) for k, v in row.items() if v not in ('', None))
+                for row in csv.DictReader(fi)
+            ]
+    raise AttributeError('Unknown spec format: %s' % filename)
+
+
+def _coordinate(directive):
+    coordinate = directive.get('coordinate')
+    if coordinate is None:
+        coordinate = [directive.get(k, 0) for k in ('x', 'y', 'z')]
+    elif isinstance(coordinate, utils.string_types):
+        coordinate = utils.str_to_vector(coordinate)
+    return [float(v) for v in coordinate]
+
+
+class _Builder(object):
+    """Accumulate directives into batches of spheres and boxes"""
+    def __init__(self):
+        self.colors = {}
+        self.coords = {}
+        self.weights = {}
+        # (name, state) -> alpha -> ('spheres', rows) or (linewidth, rows)
+        self.batches = OrderedDict()
+
+    def color(self, color):
+        # resolve each color only once
+        if not isinstance(color, utils.string_types):
+            return tuple(float(v) for v in color)
+        if color not in self.colors:
+            self.colors[color] = tuple(utils.str_to_color(color))
+        return self.colors[color]
+
+    def coordinates(self, selection, state):
+        # fetch coordinates only once for each selection
+        key = (selection, state)
+        if key not in self.coords:
+            coords = cmd.get_coords(
+                selection, state=utils.int_to_state(state),
+            )
+            if coords is None:
+                raise AttributeError('No atom is selected: %s' % selection)
+            self.coords[key] = np.asarray(coords, dtype=np.float64)
+        return self.coords[key]
+
+    def masses(self, selection):
+        # fetch masses only once for each selection and each element
+        if selection not in self.weights:
+            elements = []
+            cmd.iterate(
+                selection, 'elements.append(elem)',
+                space={'elements': elements},
+            )
+            symbols, inverse = np.unique(elements, return_inverse=True)
+            masses = []
+            for symbol in symbols:
+                atom = chempy.Atom()
+                atom.symbol = str(symbol)
+                masses.append(atom.get_mass())
+            self.weights[selection] = np.array(masses)[inverse.ravel()]
+        return self.weights[selection]
+
+    def batch(self, name, state, alpha, kind):
+        batches = self.batches.setdefault((name, state), OrderedDict())
+        return batches.setdefault(alpha, OrderedDict()).setdefault(kind, [])
+
+    def add(self, directive):
+        command = str(directive.get('command', 'sphere')).lower()
+        if command.startswith('sketch_'):
+            command = command[len('sketch_'):]
+        if command not in COMMANDS:
+            raise AttributeError('Unknown spec command: %s' % command)
+        selection = directive.get('selection', '(all)')
+        state = int(directive.get('state', -1))
+        name = directive.get('name') or None
+        color = self.color(directive.get('color', 'gray'))
+        alpha = float(directive.get('alpha', 0.5))
+
+        if command == 'sphere':
+            center = _coordinate(directive)
+            radius = float(directive.get('radius', 1.0))
+        elif command == 'bbox':
+            coords = self.coordinates(selection, state)
+            padding = float(directive.get('padding', 0))
+            linewidth = float(directive.get('linewidth', 2.0))
+            self.batch(name, state, alpha, linewidth).append(
+                list(coords.min(axis=0) - padding) +
+                list(coords.max(axis=0) + padding) +
+                list(color)
+            )
+            return
+        else:
+            coords = self.coordinates(selection, state)
+            if command == 'coc':
+                center = (coords.min(axis=0) + coords.max(axis=0)) / 2.0
+            else:
+                center = coords.mean(axis=0)
+            if command == 'radgyr':
+                if utils.str_to_bool(directive.get('mass', True)):
+                    masses = self.masses(selection)
+                else:
+                    masses = np.ones(len(coords))
+                dd = ((coords - center) ** 2).sum(axis=1)
+                radius = math.sqrt((dd * masses).sum() / masses.sum())
+            else:
+                radius = float(directive.get('radius', 1.0))
+        self.batch(name, state, alpha, 'spheres').append(
+            list(center) + [radius] + list(color)
+        )
+
+    def groups(self):
+        for (name, state), batches in self.batches.items():
+            group = shape.SketchGroup(name)
+            for alpha, kinds in batches.items():
+                members = []
+                for kind, rows in kinds.items():
+                    rows = np.array(rows, dtype=np.float64)
+                    if kind == 'spheres':
+                        members.append(shape.Spheres(
+                            rows[:, 0:3], rows[:, 3], rows[:, 4:7],
+                        ))
+                    else:
+                        members.append(shape.Boxes(
+                            rows[:, 0:3], rows[:, 3:6], rows[:, 6:9],
+                            linewidth=kind,
+                        ))
+                group.add(repr(float(alpha)), sum(members[1:], members[0]),
+                          alpha=alpha)
+            yield name, state, group
+
+
+def _build_array(array, state):
+    # spheres in a (N, 3+) array with columns x, y, z, radius, r, g, b, alpha
+    array = np.asarray(array, dtype=np.float64)
+    if array.ndim != 2 or array.shape[1] < 3:
+        raise AttributeError('A spec array requires to be (N, 3+)')
+    n, width = array.shape
+    radius = array[:, 3] if width > 3 else 1.0
+    color = array[:, 4:7] if width > 6 else utils.str_to_color('gray')
+    alpha = array[:, 7] if width > 7 else np.full(n, 0.5)
+    group = shape.SketchGroup()
+    for a in np.unique(alpha):
+        mask = alpha == a
+        group.add(repr(float(a)), shape.Spheres(
+            array[mask, 0:3],
+            radius[mask] if np.ndim(radius) else radius,
+            color[mask] if np.ndim(color) == 2 else color,
+        ), alpha=a)
+    return [(None, state, group)]
+
+
+def build(directives, state=-1):
+    """
+    Build sketch groups from directives and return a list of
+    (name, state, group)
+
+    Directives are grouped by the name and the state of the compiled graphic
+    object, and each group has a member for each alpha-value keyed by
+    repr() of the alpha-value. Coordinates of
+    a selection are fetched and colors are resolved only once.
+
+    ARGUMENTS
+
+        directives  a list of directives or a (N, 3+) array of spheres
+        state       a state-index used for an array of spheres
+
+    """
+    if isinstance(directives, np.ndarray):
+        return _build_array(directives, state)
+    builder = _Builder()
+    for directive in directives:
+        builder.add(directive)
+    return list(builder.groups())
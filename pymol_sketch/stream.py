@@ -0,0 +1,232 @@
+import numpy as np
+from pymol import cgo
+
+
+# a number of operands which follow each operation code in a primitive stream
+OPERAND_COUNTS = {
+    cgo.BEGIN: 1,
+    cgo.END: 0,
+    cgo.VERTEX: 3,
+    cgo.NORMAL: 3,
+    cgo.COLOR: 3,
+    cgo.SPHERE: 4,
+    cgo.TRIANGLE: 27,
+    cgo.CYLINDER: 13,
+    cgo.LINEWIDTH: 1,
+    cgo.WIDTHSCALE: 1,
+    cgo.ENABLE: 1,
+    cgo.DISABLE: 1,
+    cgo.SAUSAGE: 13,
+    cgo.CUSTOM_CYLINDER: 15,
+    cgo.DOTWIDTH: 1,
+    cgo.ELLIPSOID: 13,
+    cgo.ALPHA: 1,
+    cgo.CONE: 16,
+}
+
+
+class Primitives(object):
+    """Primitives collected from a primitive stream of a compiled graphic
+    object
+
+    ATTRIBUTES
+
+        spheres     (N, 7) array of (x, y, z, radius, r, g, b)
+        cylinders   (N, 13) array of (x1, y1, z1, x2, y2, z2, radius,
+                    r1, g1, b1, r2, g2, b2)
+        cones       (N, 16) array of (x1, y1, z1, x2, y2, z2,
+                    radius1, radius2, r1, g1, b1, r2, g2, b2, cap1, cap2)
+        lines       (N, 12) array of (x1, y1, z1, x2, y2, z2,
+                    r1, g1, b1, r2, g2, b2)
+        points      (N, 6) array of (x, y, z, r, g, b)
+        rest        a primitive stream without spheres, cylinders and cones
+        sphere_alphas, cylinder_alphas, cone_alphas
+                    (N,) arrays of alpha-values of spheres, cylinders and
+                    cones. NaN is used when no alpha-value is specified in
+                    the stream before them
+
+    """
+    def __init__(self, spheres, cylinders, cones, lines, points, rest,
+                 sphere_alphas, cylinder_alphas, cone_alphas):
+        self.spheres = spheres
+        self.cylinders = cylinders
+        self.cones = cones
+        self.lines = lines
+        self.points = points
+        self.rest = rest
+        self.sphere_alphas = sphere_alphas
+        self.cylinder_alphas = cylinder_alphas
+        self.cone_alphas = cone_alphas
+
+
+def _to_array(rows, width):
+    return np.array(rows, dtype=np.float64).reshape(-1, width)
+
+
+def parse(primitive):
+    """
+    Parse a primitive stream and collect primitives into arrays
+
+    Spheres, cylinders, cones and vertices in LINES or POINTS blocks are
+    collected with the color and the alpha-value at that point of the
+    stream. The stream without spheres, cylinders and cones is kept in
+    'rest', where COLOR and ALPHA are kept only when they are followed by an
+    operation in 'rest'.
+
+    ARGUMENTS
+
+        primitive   a primitive stream (list) of a compiled graphic object
+
+    """
+    spheres = []
+    cylinders = []
+    cones = []
+    lines = []
+    points = []
+    rest = []
+    sphere_alphas = []
+    cylinder_alphas = []
+    cone_alphas = []
+
+    color = [1.0, 1.0, 1.0]
+    alpha = float('nan')
+    # COLOR and ALPHA which are not put into rest yet
+    pending = {}
+    mode = None
+    vertices = []
+    i = 0
+    n = len(primitive)
+    while i < n:
+        op = primitive[i]
+        if op == cgo.STOP and mode is None:
+            break
+        try:
+            count = OPERAND_COUNTS[op]
+        except KeyError:
+            raise AttributeError('Unknown CGO operation: %s' % op)
+        operands = primitive[i+1:i+1+count]
+        i += 1 + count
+
+        if op == cgo.BEGIN:
+            mode = operands[0]
+            vertices = []
+        elif op == cgo.END:
+            if mode == cgo.LINES:
+                # an orphan vertex at the end of the block is ignored
+                for k in range(0, len(vertices) - 1, 2):
+                    (p1, c1), (p2, c2) = vertices[k], vertices[k+1]
+                    lines.append(p1 + p2 + c1 + c2)
+            elif mode == cgo.POINTS:
+                points.extend(p + c for p, c in vertices)
+            mode = None
+        elif op == cgo.COLOR:
+            color = list(operands)
+            pending[op] = operands
+            continue
+        elif op == cgo.ALPHA:
+            alpha = float(operands[0])
+            pending[op] = operands
+            continue
+        elif op == cgo.VERTEX and mode in (cgo.LINES, cgo.POINTS):
+            vertices.append((list(operands), color))
+        elif op == cgo.SPHERE and mode is None:
+            spheres.append(list(operands) + color)
+            sphere_alphas.append(alpha)
+            continue
+        elif op == cgo.CYLINDER and mode is None:
+            cylinders.append(operands)
+            cylinder_alphas.append(alpha)
+            continue
+        elif op == cgo.CONE and mode is None:
+            cones.append(operands)
+            cone_alphas.append(alpha)
+            continue
+        for k, v in pending.items():
+            rest.append(k)
+            rest.extend(v)
+        pending.clear()
+        rest.append(op)
+        rest.extend(operands)
+
+    return Primitives(
+        spheres=_to_array(spheres, 7),
+        cylinders=_to_array(cylinders, 13),
+        cones=_to_array(cones, 16),
+        lines=_to_array(lines, 12),
+        points=_to_array(points, 6),
+        rest=rest,
+        sphere_alphas=np.array(sphere_alphas, dtype=np.float64),
+        cylinder_alphas=np.array(cylinder_alphas, dtype=np.float64),
+        cone_alphas=np.array(cone_alphas, dtype=np.float64),
+    )
+
+
+def _to_primitive(columns):
+    # build a primitive stream from columns of operation codes and operands
+    n = max(len(c) for c in columns if np.ndim(c) > 0)
+    if n == 0:
+        return []
+    rows = np.empty((n, len(columns)))
+    for k, column in enumerate(columns):
+        rows[:, k] = column
+    return rows.ravel().tolist()
+
+
+def spheres_to_primitive(spheres):
+    """
+    Build a primitive stream from (N, 7) array of spheres
+    """
+    s = spheres
+    return _to_primitive([
+        cgo.COLOR, s[:, 4], s[:, 5], s[:, 6],
+        cgo.SPHERE, s[:, 0], s[:, 1], s[:, 2], s[:, 3],
+    ])
+
+
+def cylinders_to_primitive(cylinders):
+    """
+    Build a primitive stream from (N, 13) array of cylinders
+    """
+    return _to_primitive([cgo.CYLINDER] + list(cylinders.T))
+
+
+def cones_to_primitive(cones):
+    """
+    Build a primitive stream from (N, 16) array of cones
+    """
+    return _to_primitive([cgo.CONE] + list(cones.T))
+
+
+def lines_to_primitive(lines, linewidth=None):
+    """
+    Build a primitive stream of a LINES block from (N, 12) array of lines
+    """
+    body = _to_primitive([
+        cgo.COLOR, lines[:, 6], lines[:, 7], lines[:, 8],
+        cgo.VERTEX, lines[:, 0], lines[:, 1], lines[:, 2],
+        cgo.COLOR, lines[:, 9], lines[:, 10], lines[:, 11],
+        cgo.VERTEX, lines[:, 3], lines[:, 4], lines[:, 5],
+    ])
+    if not body:
+        return []
+    head = [cgo.BEGIN, cgo.LINES]
+    if linewidth is not None:
+        head = [cgo.LINEWIDTH, float(linewidth)] + head
+    return head + body + [cgo.END]
+
+
+def points_to_primitive(points, size=None):
+    """
+    Build a primitive stream of a POINTS block from (N, 6) array of points
+    """
+    p = points
+    body = _to_primitive([
+        cgo.COLOR, p[:, 3], p[:, 4], p[:, 5],
+        cgo.VERTEX, p[:, 0], p[:, 1], p[:, 2],
+    ])
+    if not body:
+        return []
+    head = [cgo.BEGIN, cgo.POINTS]
+    if size is not None:
+        head = [cgo.DOTWIDTH, float(size)] + head
+    return head + body + [cgo.END]
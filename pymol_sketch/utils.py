@@ -1,27 +1,144 @@
 import re
+import numpy as np
 from pymol import cmd
 
 
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+
 NUMBER_PATTERN = r'[-+]?(?:\d+(?:\.\d+)?|\.\d+)'
+VECTOR_PATTERN = re.compile(
+    r'\s*{0}(?:\s*,\s*{0})*\s*'.format(NUMBER_PATTERN)
+)
+# a string which is a vector as a whole, like '(0, 1, 0)' or '[1,0,0]'
+VECTOR_STRING_PATTERN = re.compile(
+    r'\s*[(\[]?\s*{0}(?:\s*,\s*{0})*\s*[)\]]?\s*$'.format(NUMBER_PATTERN)
+)
+
+# built-in gradients used by colormap
+GRADIENTS = {
+    'rainbow': [
+        (0.0, 0.0, 1.0), (0.0, 1.0, 1.0), (0.0, 1.0, 0.0),
+        (1.0, 1.0, 0.0), (1.0, 0.0, 0.0),
+    ],
+    'blue_white_red': [(0.0, 0.0, 1.0), (1.0, 1.0, 1.0), (1.0, 0.0, 0.0)],
+    'red_white_blue': [(1.0, 0.0, 0.0), (1.0, 1.0, 1.0), (0.0, 0.0, 1.0)],
+    'grayscale': [(0.0, 0.0, 0.0), (1.0, 1.0, 1.0)],
+}
+
+# a cache of PyMOL color names to color indices
+_palette = None
 
 
 def str_to_vector(s):
-    pattern = r'\s*{0}(?:\s*,\s*{0})*\s*'.format(NUMBER_PATTERN)
-    m = re.search(pattern, s)
+    m = VECTOR_PATTERN.search(s)
     if m is not None:
         return list(map(float, m.group().split(',')))
     else:
         raise AttributeError('A value requires to be like (0, 1, ...)')
 
 
+def get_palette(refresh=False):
+    """
+    Return a cached dict of PyMOL color names to color indices
+
+    Color indices are cached instead of color vectors so redefined colors
+    are resolved correctly. The cache is refreshed when an unknown color
+    name is resolved by str_to_color.
+    """
+    global _palette
+    if _palette is None or refresh:
+        _palette = dict(cmd.get_color_indices())
+    return _palette
+
+
+def invalidate_palette():
+    """
+    Clear the cached palette of PyMOL colors
+    """
+    global _palette
+    _palette = None
+
+
 def str_to_color(c):
-    color_map = dict(cmd.get_color_indices())
-    if c in color_map:
-        return cmd.get_color_tuple(color_map[c])
+    if not isinstance(c, string_types):
+        return list(map(float, c))
+    palette = get_palette()
+    if c not in palette and VECTOR_STRING_PATTERN.match(c) is None:
+        # the color might be defined after the palette was cached
+        palette = get_palette(refresh=True)
+    if c in palette:
+        return cmd.get_color_tuple(palette[c])
     return str_to_vector(c)
 
 
+def str_to_gradient(s):
+    """
+    Return (K, 3) array of colors of a gradient
+
+    s is a name of built-in gradients (see GRADIENTS) or a PyMOL palette
+    like 'blue_white_red' whose color names are joined by '_' or spaces.
+    """
+    if s in GRADIENTS:
+        return np.array(GRADIENTS[s], dtype=np.float64)
+    names = re.split(r'[_\s]+', s.strip())
+    return np.array([str_to_color(n) for n in names], dtype=np.float64)
+
+
+def colormap(values, gradient='rainbow', minimum=None, maximum=None):
+    """
+    Map (N,) array of scalars to (N, 3) array of colors
+
+    ARGUMENTS
+
+        values      (N,) array of scalars like B-factors or displacements
+        gradient    a name of a gradient or a PyMOL palette, or (K, 3)
+                    array of colors (see str_to_gradient)
+        minimum     a value mapped to the first color (Default: min)
+        maximum     a value mapped to the last color (Default: max)
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if isinstance(gradient, string_types):
+        gradient = str_to_gradient(gradient)
+    gradient = np.asarray(gradient, dtype=np.float64).reshape(-1, 3)
+    if minimum is None:
+        minimum = np.nanmin(values) if values.size else 0.0
+    if maximum is None:
+        maximum = np.nanmax(values) if values.size else 1.0
+    t = (values - minimum) / ((maximum - minimum) or 1.0)
+    levels = np.linspace(0, 1, len(gradient))
+    return np.stack([
+        np.interp(t, levels, gradient[:, k]) for k in range(3)
+    ], axis=-1)
+
+
+def str_to_bool(s):
+    if isinstance(s, string_types):
+        return s.strip().lower() not in ('', '0', 'false', 'no')
+    return bool(s)
+
+
 def int_to_state(s):
     if s == -1:
         return cmd.get_state()
     return s
+
+
+def load_array(filename, columns=3, dtype='float32'):
+    """
+    Memory-map a (N, columns) array in a .npy file or a raw binary file
+
+    The number of columns and the dtype are used only for a raw binary file.
+    """
+    if filename.lower().endswith('.npy'):
+        array = np.load(filename, mmap_mode='r')
+    else:
+        array = np.memmap(filename, dtype=dtype, mode='r')
+        array = array.reshape(-1, int(columns))
+    if array.ndim != 2 or array.shape[1] < 3:
+        raise AttributeError('An array requires to be (N, 3+)')
+    return array
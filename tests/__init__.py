@@ -0,0 +1,123 @@
+"""Minimal stand-ins of pymol and chempy so tests run without PyMOL
+
+The stand-ins are installed into sys.modules before pymol_sketch is imported
+so the pure NumPy logic can be tested outside of PyMOL.
+"""
+import sys
+import math
+import types
+from collections import Counter
+from collections import OrderedDict
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+cgo = _module(
+    'pymol.cgo',
+    STOP=0.0, POINTS=0.0, LINES=1.0, LINE_LOOP=2.0, LINE_STRIP=3.0,
+    TRIANGLES=4.0, TRIANGLE_STRIP=5.0, TRIANGLE_FAN=6.0,
+    BEGIN=2.0, END=3.0, VERTEX=4.0, NORMAL=5.0, COLOR=6.0, SPHERE=7.0,
+    TRIANGLE=8.0, CYLINDER=9.0, LINEWIDTH=10.0, WIDTHSCALE=11.0,
+    ENABLE=12.0, DISABLE=13.0, SAUSAGE=14.0, CUSTOM_CYLINDER=15.0,
+    DOTWIDTH=16.0, ELLIPSOID=18.0, ALPHA=25.0, CONE=27.0,
+)
+
+
+class _Cmd(types.ModuleType):
+    """A stand-in of pymol.cmd which records calls and loaded objects"""
+    def __init__(self):
+        super(_Cmd, self).__init__('pymol.cmd')
+        self.reset()
+
+    def reset(self):
+        self.calls = Counter()
+        self.loaded = {}
+        self.states = {}
+        self.colors = OrderedDict([
+            ('white', (1.0, 1.0, 1.0)),
+            ('red', (1.0, 0.0, 0.0)),
+            ('green', (0.0, 1.0, 0.0)),
+            ('blue', (0.0, 0.0, 1.0)),
+            ('gray', (0.5, 0.5, 0.5)),
+        ])
+        # selection -> list of (coordinate, element)
+        self.atoms = {}
+
+    def get_color_indices(self):
+        self.calls['get_color_indices'] += 1
+        return [(name, i) for i, name in enumerate(self.colors)]
+
+    def get_color_tuple(self, index):
+        return list(self.colors.values())[index]
+
+    def get_unused_name(self, prefix='obj', alwaysnumber=1):
+        n = 1
+        while '%s%02d' % (prefix, n) in self.loaded:
+            n += 1
+        return '%s%02d' % (prefix, n)
+
+    def get_state(self):
+        return 1
+
+    def get(self, name):
+        return 1.0
+
+    def set(self, name, value):
+        pass
+
+    def delete(self, name):
+        self.loaded.pop(name, None)
+
+    def load_cgo(self, primitive, name, state=0):
+        self.calls['load_cgo'] += 1
+        self.loaded[name] = primitive
+        self.states[name] = state
+
+    def get_coords(self, selection='all', state=1):
+        import numpy as np
+        self.calls['get_coords'] += 1
+        atoms = self.atoms.get(selection)
+        if not atoms:
+            return None
+        return np.array([c for c, _ in atoms], dtype=np.float32)
+
+    def iterate(self, selection, expression, space=None):
+        self.calls['iterate'] += 1
+        for _, elem in self.atoms.get(selection, []):
+            exec(expression, space, {'elem': elem})
+
+
+cmd = _Cmd()
+sys.modules['pymol.cmd'] = cmd
+_module('pymol', cgo=cgo, cmd=cmd)
+
+
+class Atom(object):
+    MASSES = {'H': 1.008, 'C': 12.011, 'N': 14.007, 'O': 15.999}
+
+    def __init__(self):
+        self.symbol = 'X'
+
+    def get_mass(self):
+        return self.MASSES[self.symbol]
+
+
+def _normalize(v):
+    norm = math.sqrt(sum(x * x for x in v))
+    return [x / norm for x in v]
+
+
+cpv = _module(
+    'chempy.cpv',
+    add=lambda a, b: [x + y for x, y in zip(a, b)],
+    sub=lambda a, b: [x - y for x, y in zip(a, b)],
+    scale=lambda a, s: [x * s for x in a],
+    normalize=_normalize,
+    get_null=lambda: [0.0, 0.0, 0.0],
+)
+_module('chempy', Atom=Atom, cpv=cpv)
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from tests import cgo
+from tests import cmd
+from pymol_sketch import stream
+from pymol_sketch import commands
+
+
+class SketchPointsTestCase(unittest.TestCase):
+    def setUp(self):
+        cmd.reset()
+        commands._groups.clear()
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'points.npy')
+        array = np.zeros((5, 4), dtype=np.float32)
+        array[:, 0] = np.arange(5)
+        array[:, 3] = np.arange(5)
+        np.save(self.filename, array)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        commands._active_group = None
+
+    def test_spheres(self):
+        commands.sketch_points(self.filename, name='points', chunk=2,
+                               verbose=False)
+        self.assertEqual(cmd.calls['load_cgo'], 1)
+        spheres = stream.parse(cmd.loaded['points']).spheres
+        self.assertEqual(len(spheres), 5)
+
+    def test_chunk_keys(self):
+        commands.sketch_points(self.filename, name='points', chunk=2,
+                               representation='points', alpha=0.3,
+                               keep=True, verbose=False)
+        self.assertEqual(commands._groups['points'].keys(), ['0', '1', '2'])
+        self.assertEqual(cmd.loaded['points'][:2], [cgo.ALPHA, 0.3])
+        points = stream.parse(cmd.loaded['points']).points
+        self.assertEqual(points[:, 0].tolist(), [0, 1, 2, 3, 4])
+        commands.sketch_group_remove('1', group='points')
+        points = stream.parse(cmd.loaded['points']).points
+        self.assertEqual(points[:, 0].tolist(), [0, 1, 4])
+        self.assertEqual(cmd.loaded['points'][:2], [cgo.ALPHA, 0.3])
+
+    def test_not_kept(self):
+        commands.sketch_points(self.filename, name='points', verbose=False)
+        self.assertFalse('points' in commands._groups)
+
+    def test_in_group(self):
+        commands.sketch_group('markers')
+        commands.sketch_points(self.filename, name='points', verbose=False)
+        commands.sketch_group(verbose=False)
+        self.assertEqual(commands._groups['markers'].keys(), ['points'])
+        spheres = stream.parse(cmd.loaded['markers']).spheres
+        self.assertEqual(len(spheres), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
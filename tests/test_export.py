@@ -0,0 +1,92 @@
+import os
+import json
+import struct
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from tests import cmd
+from pymol_sketch import shape
+from pymol_sketch import export
+
+
+class ExportTestCase(unittest.TestCase):
+    def setUp(self):
+        cmd.reset()
+        self.directory = tempfile.mkdtemp()
+        self.cgo = (
+            shape.Spheres(np.zeros((3, 3)), 1.0, (1, 0, 0)) +
+            shape.Cylinder((0, 0, 0), (0, 0, 5), 0.3, (0, 1, 0)) +
+            shape.Cone((0, 0, 0), (5, 0, 0), 0.5, (0, 1, 0)) +
+            shape.Box(*[(i, i, i) for i in range(8)], color=(0, 0, 1)) +
+            shape.Points(np.ones((4, 3)), (1, 1, 1))
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_tessellate(self):
+        mesh = export.tessellate(self.cgo, segments=8)
+        # 8 slices x 3 rings and 2 poles for a sphere, 4 rings and 2 centers
+        # for a cylinder and a cone
+        self.assertEqual(len(mesh.positions), 3 * 26 + 2 * 34)
+        # 8 slices x 6 triangles for a sphere, 8 x 4 triangles for a
+        # cylinder and 8 x 2 for a cone without the tip
+        self.assertEqual(len(mesh.indices), 3 * 48 + 32 + 16)
+        self.assertLess(mesh.indices.max(), len(mesh.positions))
+        self.assertEqual(len(mesh.line_positions), 24)
+        self.assertEqual(len(mesh.point_positions), 4)
+        # triangles are not degenerate and face outward
+        triangles = mesh.positions[mesh.indices]
+        normals = np.cross(triangles[:, 1] - triangles[:, 0],
+                           triangles[:, 2] - triangles[:, 0])
+        self.assertTrue((np.linalg.norm(normals, axis=1) > 1e-4).all())
+        vertex_normals = mesh.normals[mesh.indices].mean(axis=1)
+        self.assertTrue(((normals * vertex_normals).sum(1) > 0).all())
+
+    def test_write_gltf(self):
+        filename = os.path.join(self.directory, 'sketch.glb')
+        export.write_gltf(self.cgo, filename, segments=8)
+        with open(filename, 'rb') as fi:
+            data = fi.read()
+        magic, version, length = struct.unpack('<4sII', data[:12])
+        self.assertEqual((magic, version, length), (b'glTF', 2, len(data)))
+        json_length, json_type = struct.unpack('<I4s', data[12:20])
+        self.assertEqual(json_type, b'JSON')
+        self.assertEqual(json_length % 4, 0)
+        document = json.loads(data[20:20+json_length].decode('utf-8'))
+        offset = 20 + json_length
+        bin_length, bin_type = struct.unpack('<I4s', data[offset:offset+8])
+        self.assertEqual(bin_type, b'BIN\x00')
+        self.assertEqual(offset + 8 + bin_length, len(data))
+        self.assertEqual(document['buffers'][0]['byteLength'], bin_length)
+
+        mesh = export.tessellate(self.cgo, segments=8)
+        accessors = document['accessors']
+        triangles, lines, points = document['meshes'][0]['primitives']
+        self.assertEqual([triangles['mode'], lines['mode'], points['mode']],
+                         [4, 1, 0])
+        position = accessors[triangles['attributes']['POSITION']]
+        self.assertEqual(position['count'], len(mesh.positions))
+        self.assertEqual(accessors[triangles['indices']]['count'],
+                         mesh.indices.size)
+        self.assertEqual(accessors[lines['attributes']['POSITION']]['count'],
+                         24)
+        self.assertEqual(accessors[points['attributes']['COLOR_0']]['count'],
+                         4)
+
+    def test_write_obj(self):
+        filename = os.path.join(self.directory, 'sketch.obj')
+        export.write_obj(self.cgo, filename, segments=8)
+        with open(filename, 'r') as fi:
+            rows = [line.split()[0] for line in fi if line[0] != '#']
+        mesh = export.tessellate(self.cgo, segments=8)
+        self.assertEqual(rows.count('v'), len(mesh.positions) + 24 + 4)
+        self.assertEqual(rows.count('vn'), len(mesh.normals))
+        self.assertEqual(rows.count('f'), len(mesh.indices))
+        self.assertEqual(rows.count('l'), 12)
+        self.assertEqual(rows.count('p'), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
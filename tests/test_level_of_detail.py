@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+from tests import cgo
+from tests import cmd
+from pymol_sketch import shape
+from pymol_sketch import stream
+from pymol_sketch import commands
+from pymol_sketch import level_of_detail
+
+
+class DecimateTestCase(unittest.TestCase):
+    def test_merge(self):
+        spheres = np.array([
+            [0.1, 0.1, 0.1, 1.0, 1, 0, 0],
+            [0.5, 0.5, 0.5, 2.0, 0, 0, 1],
+            [5.0, 5.0, 5.0, 1.0, 0, 1, 0],
+        ])
+        merged = level_of_detail.decimate(spheres, 2.0)
+        merged = merged[np.argsort(merged[:, 0])]
+        self.assertEqual(merged.tolist(), [
+            [0.3, 0.3, 0.3, 2.0, 0.5, 0, 0.5],
+            [5.0, 5.0, 5.0, 1.0, 0, 1, 0],
+        ])
+
+
+class ReduceTestCase(unittest.TestCase):
+    def setUp(self):
+        cmd.reset()
+        commands._groups.clear()
+
+    def test_alpha_kept(self):
+        commands.sketch_group('markers')
+        for i in range(5):
+            commands.sketch_sphere('%d, 0, 0' % i, alpha=0.5)
+        commands.sketch_group(lod='points', verbose=False)
+        primitive = cmd.loaded['markers']
+        begin = primitive.index(cgo.BEGIN)
+        self.assertEqual(primitive[begin-4:begin-2], [cgo.ALPHA, 0.5])
+        self.assertEqual(primitive[begin+1], cgo.POINTS)
+        # colors of the spheres are not left in the stream
+        self.assertEqual(primitive[:2], [cgo.ALPHA, 1.0])
+        self.assertEqual(len(primitive), 2 + 2 + 2 + 2 + 5 * 8 + 1)
+
+    def test_inherited_alpha(self):
+        cgo_ = shape.Spheres(np.zeros((3, 3)), 1.0, (1, 0, 0))
+        cgo_.create('spheres', alpha=0.3, lod='points')
+        primitive = cmd.loaded['spheres']
+        self.assertEqual(primitive[:2], [cgo.ALPHA, 0.3])
+        self.assertEqual(primitive.count(cgo.ALPHA), 1)
+
+    def test_rest_kept(self):
+        box = shape.Box(*[(i, i, i) for i in range(8)], color=(0, 0, 1))
+        cgo_ = shape.Sphere((0, 0, 0), 1, (1, 0, 0)) + box
+        primitives = stream.parse(cgo_.lod_primitive('points'))
+        self.assertEqual(len(primitives.points), 1)
+        self.assertEqual(len(primitives.lines), 12)
+        self.assertEqual(primitives.lines[0, 6:9].tolist(), [0, 0, 1])
+
+    def test_full_is_cached(self):
+        cgo_ = shape.Spheres(np.zeros((3, 3)), 1.0, (1, 0, 0))
+        self.assertIs(cgo_.lod_primitive('full'), cgo_.primitive)
+        self.assertIs(cgo_.lod_primitive('points'),
+                      cgo_.lod_primitive('points'))
+
+    def test_sparse_grid_falls_back_to_points(self):
+        level = level_of_detail.LevelOfDetail(points=10, grid=100)
+        points = np.random.RandomState(0).rand(200, 3) * 1000
+        cgo_ = shape.Spheres(points, 1.0, (1, 0, 0))
+        primitives = stream.parse(cgo_.lod_primitive(level))
+        self.assertEqual(len(primitives.spheres), 0)
+        self.assertEqual(len(primitives.points), 200)
+
+    def test_dense_grid(self):
+        level = level_of_detail.LevelOfDetail(points=10, grid=100)
+        points = np.random.RandomState(0).rand(200, 3)
+        cgo_ = shape.Spheres(points, 1.0, (1, 0, 0))
+        primitives = stream.parse(cgo_.lod_primitive(level))
+        self.assertEqual(len(primitives.spheres), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
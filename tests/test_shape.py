@@ -0,0 +1,85 @@
+import unittest
+from tests import cgo
+from tests import cmd
+from pymol_sketch import shape
+
+
+class SketchGroupTestCase(unittest.TestCase):
+    def setUp(self):
+        cmd.reset()
+        self.group = shape.SketchGroup('markers')
+        for i in range(4):
+            self.group.add('k%d' % i, self.sphere(i))
+
+    def sphere(self, x, n=1):
+        cgo_ = shape.Sphere((x, 0, 0), 1.0, (1, 0, 0))
+        for _ in range(n - 1):
+            cgo_ = cgo_ + shape.Sphere((x, 0, 0), 1.0, (1, 0, 0))
+        return cgo_
+
+    def assertMembers(self, expected):
+        self.assertEqual(self.group.keys(), [k for k, _ in expected])
+        primitive = []
+        for key, cgo_ in expected:
+            self.assertEqual(self.group.get(key), cgo_.primitive)
+            primitive += cgo_.primitive
+        self.assertEqual(self.group.primitive, primitive)
+
+    def test_add(self):
+        self.assertEqual(len(self.group), 4)
+        self.assertTrue('k1' in self.group)
+        self.assertEqual(self.group.unused_key('k'), 'k05')
+        self.assertMembers([('k%d' % i, self.sphere(i)) for i in range(4)])
+
+    def test_update_longer(self):
+        self.group.update('k1', self.sphere(9, 3))
+        self.assertMembers([
+            ('k0', self.sphere(0)), ('k1', self.sphere(9, 3)),
+            ('k2', self.sphere(2)), ('k3', self.sphere(3)),
+        ])
+
+    def test_update_shorter(self):
+        self.group.update('k1', self.sphere(9, 3))
+        self.group.update('k2', shape.CGO())
+        self.group.update('k1', self.sphere(8))
+        self.assertMembers([
+            ('k0', self.sphere(0)), ('k1', self.sphere(8)),
+            ('k2', shape.CGO()), ('k3', self.sphere(3)),
+        ])
+
+    def test_add_existing_key(self):
+        self.group.add('k2', self.sphere(7, 2))
+        self.assertMembers([
+            ('k0', self.sphere(0)), ('k1', self.sphere(1)),
+            ('k2', self.sphere(7, 2)), ('k3', self.sphere(3)),
+        ])
+
+    def test_remove(self):
+        self.group.update('k2', self.sphere(2, 2))
+        self.group.remove('k0')
+        self.assertMembers([
+            ('k1', self.sphere(1)), ('k2', self.sphere(2, 2)),
+            ('k3', self.sphere(3)),
+        ])
+        self.group.remove('k2')
+        self.assertMembers([('k1', self.sphere(1)), ('k3', self.sphere(3))])
+        self.group.remove('k3')
+        self.assertMembers([('k1', self.sphere(1))])
+        self.assertRaises(KeyError, self.group.get, 'k3')
+
+    def test_alpha(self):
+        self.group.add('k9', self.sphere(9), alpha=0.5)
+        self.assertEqual(self.group.get('k9'),
+                         [cgo.ALPHA, 0.5] + self.sphere(9).primitive)
+
+    def test_create(self):
+        self.group.create(state=3, lod='points')
+        self.assertEqual(cmd.states['markers'], 3)
+        self.group.remove('k0')
+        self.group.create()
+        self.assertEqual(cmd.states['markers'], 3)
+        self.assertEqual(self.group.lod, 'points')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from tests import cgo
+from tests import cmd
+from pymol_sketch import spec
+from pymol_sketch import stream
+from pymol_sketch import commands
+
+
+class SpecTestCase(unittest.TestCase):
+    def setUp(self):
+        cmd.reset()
+        commands._groups.clear()
+        cmd.atoms['a'] = [((0, 0, 0), 'C'), ((2, 4, 6), 'H')]
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        commands._active_group = None
+
+    def write(self, filename, content):
+        filename = os.path.join(self.directory, filename)
+        with open(filename, 'w') as fo:
+            fo.write(content)
+        return filename
+
+    def test_load_json(self):
+        directives = [{'command': 'sphere', 'coordinate': [1, 2, 3]}]
+        filename = self.write('spec.json', json.dumps(directives))
+        self.assertEqual(spec.load(filename), directives)
+
+    def test_load_csv(self):
+        filename = self.write(
+            'spec.csv', 'command,selection,x,y,z\nsphere,,1,2,3\n',
+        )
+        self.assertEqual(spec.load(filename), [
+            {'command': 'sphere', 'x': '1', 'y': '2', 'z': '3'},
+        ])
+
+    def test_load_npy(self):
+        filename = os.path.join(self.directory, 'spec.npy')
+        np.save(filename, np.zeros((4, 3)))
+        self.assertEqual(spec.load(filename).shape, (4, 3))
+
+    def test_unknown_command(self):
+        self.assertRaises(AttributeError, spec.build, [{'command': 'foo'}])
+
+    def test_build(self):
+        groups = spec.build([
+            {'command': 'sketch_com', 'selection': 'a'},
+            {'command': 'coc', 'selection': 'a', 'color': 'red'},
+            {'command': 'bbox', 'selection': 'a', 'padding': 1},
+            {'command': 'sphere', 'coordinate': '1, 2, 3', 'alpha': 1},
+            {'command': 'sphere', 'x': 1, 'name': 'other', 'state': 2},
+        ])
+        self.assertEqual([(n, s) for n, s, _ in groups],
+                         [(None, -1), ('other', 2)])
+        group = groups[0][2]
+        self.assertEqual(group.keys(), ['0.5', '1.0'])
+        primitives = stream.parse(group.get('0.5'))
+        self.assertEqual(primitives.spheres[:, 0:4].tolist(),
+                         [[1, 2, 3, 1], [1, 2, 3, 1]])
+        self.assertEqual(primitives.spheres[1, 4:7].tolist(), [1, 0, 0])
+        self.assertEqual(primitives.lines[:, 0:6].min(), -1)
+        self.assertEqual(primitives.lines[:, 0:6].max(), 7)
+        # coordinates are fetched once and masses are not needed
+        self.assertEqual(cmd.calls['get_coords'], 1)
+        self.assertEqual(cmd.calls['iterate'], 0)
+
+    def test_radgyr(self):
+        groups = spec.build([
+            {'command': 'radgyr', 'selection': 'a'},
+            {'command': 'radgyr', 'selection': 'a', 'mass': 'false'},
+        ])
+        spheres = stream.parse(groups[0][2].primitive).spheres
+        self.assertAlmostEqual(spheres[0, 3], np.sqrt(14))
+        self.assertAlmostEqual(spheres[1, 3], np.sqrt(14))
+        self.assertEqual(cmd.calls['iterate'], 1)
+
+    def test_build_array(self):
+        array = np.zeros((4, 8))
+        array[:, 7] = [0.5, 0.5, 1.0, 1.0]
+        (name, state, group), = spec.build(array, state=3)
+        self.assertEqual((name, state), (None, 3))
+        self.assertEqual(group.keys(), ['0.5', '1.0'])
+
+    def test_close_alphas(self):
+        array = np.zeros((2, 8))
+        array[:, 7] = [0.1234561, 0.1234564]
+        (_, _, group), = spec.build(array)
+        self.assertEqual(len(group), 2)
+        self.assertEqual(len(stream.parse(group.primitive).spheres), 2)
+
+    def test_run_keep(self):
+        filename = self.write('spec.json', json.dumps([
+            {'command': 'sphere', 'name': 'A', 'alpha': 0.3},
+        ]))
+        commands.sketch_run(filename, verbose=False)
+        self.assertFalse('A' in commands._groups)
+        commands.sketch_run(filename, keep='1', verbose=False)
+        self.assertEqual(commands._groups['A'].keys(), ['0.3'])
+
+    def test_run(self):
+        filename = self.write('spec.json', json.dumps([
+            {'command': 'sphere', 'name': 'A', 'state': 1},
+            {'command': 'sphere', 'name': 'A', 'state': 2},
+            {'command': 'sphere'},
+        ]))
+        commands.sketch_run(filename, verbose=False)
+        self.assertEqual(cmd.calls['load_cgo'], 3)
+        self.assertEqual(cmd.states['A'], 2)
+
+    def test_run_in_group(self):
+        filename = self.write('spec.json', json.dumps([
+            {'command': 'sphere', 'name': 'A', 'state': 1},
+            {'command': 'sphere', 'name': 'A', 'state': 2},
+        ]))
+        commands.sketch_group('markers')
+        commands.sketch_run(filename, verbose=False)
+        self.assertEqual(commands._groups['markers'].keys(), ['A_1', 'A_2'])
+        commands.sketch_group(verbose=False)
+        self.assertEqual(cmd.loaded['markers'].count(cgo.SPHERE), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
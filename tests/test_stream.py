@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+from tests import cgo
+from pymol_sketch import shape
+from pymol_sketch import stream
+
+
+class ParseTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        primitive = (
+            shape.Sphere((0, 1, 2), 1.5, (1, 0, 0)) +
+            shape.Cylinder((0, 0, 0), (1, 1, 1), 0.2, (0, 1, 0)) +
+            shape.Cone((0, 0, 0), (0, 0, 1), 0.5, (0, 0, 1))
+        ).primitive
+        primitives = stream.parse(primitive)
+        self.assertEqual(primitives.spheres.tolist(),
+                         [[0, 1, 2, 1.5, 1, 0, 0]])
+        self.assertEqual(len(primitives.cylinders), 1)
+        self.assertEqual(len(primitives.cones), 1)
+        rebuilt = (
+            stream.spheres_to_primitive(primitives.spheres) +
+            stream.cylinders_to_primitive(primitives.cylinders) +
+            stream.cones_to_primitive(primitives.cones)
+        )
+        self.assertEqual(rebuilt, [float(v) for v in primitive])
+
+    def test_lines_and_points(self):
+        box = shape.Box(*[(i, i, i) for i in range(8)], color=(0, 0, 1))
+        primitives = stream.parse(box.primitive)
+        self.assertEqual(primitives.lines.shape, (12, 12))
+        self.assertEqual(primitives.lines[0].tolist(),
+                         [0, 0, 0, 1, 1, 1, 0, 0, 1, 0, 0, 1])
+        rows = np.arange(12, dtype=np.float64).reshape(2, 6)
+        primitives = stream.parse(stream.points_to_primitive(rows, 4.0))
+        self.assertEqual(primitives.points.tolist(), rows.tolist())
+
+    def test_triangle(self):
+        primitive = [cgo.TRIANGLE] + list(range(1, 28)) + [
+            cgo.SPHERE, 0, 0, 0, 1,
+        ]
+        primitives = stream.parse(primitive)
+        self.assertEqual(len(primitives.spheres), 1)
+        self.assertEqual(primitives.rest, primitive[:28])
+
+    def test_unknown_operation(self):
+        self.assertRaises(AttributeError, stream.parse, [999.0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+from tests import cmd
+from pymol_sketch import utils
+
+
+class PaletteTestCase(unittest.TestCase):
+    def setUp(self):
+        cmd.reset()
+        utils.invalidate_palette()
+
+    def test_cached(self):
+        for color in ['red', 'gray', 'red', 'blue']:
+            utils.str_to_color(color)
+        self.assertEqual(cmd.calls['get_color_indices'], 1)
+
+    def test_vector(self):
+        for color in ['(0, 0.2, 0)', '[1,0,0]', '0, 1, 0'] * 2:
+            utils.str_to_color(color)
+        self.assertEqual(utils.str_to_color('(0, 0.2, 0)'), [0, 0.2, 0])
+        self.assertEqual(utils.str_to_color((0, 1, 0)), [0, 1, 0])
+        self.assertEqual(cmd.calls['get_color_indices'], 1)
+
+    def test_refresh(self):
+        utils.str_to_color('red')
+        cmd.colors['orange'] = (1.0, 0.5, 0.0)
+        self.assertEqual(utils.str_to_color('orange'), (1.0, 0.5, 0.0))
+        self.assertEqual(cmd.calls['get_color_indices'], 2)
+        utils.str_to_color('orange')
+        self.assertEqual(cmd.calls['get_color_indices'], 2)
+        utils.invalidate_palette()
+        utils.str_to_color('orange')
+        self.assertEqual(cmd.calls['get_color_indices'], 3)
+
+    def test_refresh_name_with_digit(self):
+        utils.str_to_color('red')
+        cmd.colors['pocket1'] = (0.2, 0.4, 0.6)
+        self.assertEqual(utils.str_to_color('pocket1'), (0.2, 0.4, 0.6))
+        self.assertEqual(cmd.calls['get_color_indices'], 2)
+
+    def test_redefined(self):
+        utils.str_to_color('red')
+        cmd.colors['red'] = (0.9, 0.0, 0.0)
+        self.assertEqual(utils.str_to_color('red'), (0.9, 0.0, 0.0))
+
+
+class ColormapTestCase(unittest.TestCase):
+    def setUp(self):
+        cmd.reset()
+        utils.invalidate_palette()
+
+    def test_gradient(self):
+        colors = utils.colormap([0, 5, 10], 'rainbow')
+        self.assertEqual(colors.tolist(), [[0, 0, 1], [0, 1, 0], [1, 0, 0]])
+
+    def test_palette(self):
+        colors = utils.colormap(np.array([0.0, 0.5, 1.0]), 'blue_white_red')
+        self.assertEqual(colors.tolist(),
+                         [[0, 0, 1], [1, 1, 1], [1, 0, 0]])
+
+    def test_range(self):
+        colors = utils.colormap([5, 15], 'grayscale', minimum=0, maximum=20)
+        self.assertEqual(colors.tolist(),
+                         [[0.25] * 3, [0.75] * 3])
+        colors = utils.colormap([-1, 30], 'grayscale', minimum=0, maximum=20)
+        self.assertEqual(colors.tolist(), [[0] * 3, [1] * 3])
+
+    def test_empty(self):
+        self.assertEqual(utils.colormap([], 'rainbow').shape, (0, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()